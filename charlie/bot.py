@@ -14,26 +14,156 @@ This module contains the code for the Discord bot that will be used to count in
 #  You should have received a copy of the GNU General Public License along with charlie. If not,
 #  see <https://www.gnu.org/licenses/>.
 
+import asyncio
 import json
+import logging
+import mmap
 import os
 import pathlib
 import signal
 import sys
+import tempfile
 import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Optional
+from types import FrameType
+from typing import Any, Mapping, Optional, cast
 
 import discord
+import msgpack
 from discord import app_commands
 from dotenv import load_dotenv
 
-from .leaderboard import Leaderboard
+from .leaderboard import Leaderboard, LeaderboardEntry
+from .parsing import parse_message
 
-COUNT_PATH = pathlib.Path().absolute() / "data" / "count.json"
+COUNT_PATH = pathlib.Path().absolute() / "data" / "count.msgpack"
+LEGACY_COUNT_PATH = pathlib.Path().absolute() / "data" / "count.json"
+SAVE_INTERVAL = 1.0
+RATE_LIMIT_INTERVAL = 0.1
+RATE_LIMIT_MAX_USERS = 10_000
+
+# The reactions are built once so that they are not parsed again for every message.
+REACTION_RUINED = discord.PartialEmoji(name="❌")
+REACTION_COUNTED = discord.PartialEmoji(name="✅")
+REACTION_HIGHEST_COUNT = discord.PartialEmoji(name="🎉")
+REACTION_BEAT_USER = discord.PartialEmoji(name="🌟")
+REACTION_BEAT_RANK = discord.PartialEmoji(name="⭐")
+
+RUINED_MESSAGE = (
+    "{mention} **RUINED THE COUNT** at {count}. The next number is {next_count}."
+)
+RUINED_REPEATED_USER_MESSAGE = RUINED_MESSAGE + " **You can't count twice in a row**"
+
+logger = logging.getLogger(__name__)
+
+write_lock = threading.Lock()
+
+# mkstemp creates files that only their owner can read, so saves set the mode open() would have given the file. The
+# umask can only be read by setting it, which is done once here before any other thread is started.
+file_umask = os.umask(0)
+os.umask(file_umask)
+FILE_MODE = 0o666 & ~file_umask
 
 load_dotenv()
 
 
+def write_atomic(path: pathlib.Path, data: bytes) -> None:
+    """
+    Writes data to a file.
+
+    The data is written to a temporary file first and then moved over the file, so a crash while writing never
+    leaves a partially written file behind.
+    :param path: The path to the file.
+    :param data: The data to write.
+    """
+
+    # The flush loop writes from a worker thread while the signal handler may save from the main thread. Each write
+    # gets its own temporary file, and the lock makes the later save replace the file last.
+    with write_lock:
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=path.name + ".", suffix=".tmp", dir=path.parent
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                os.chmod(tmp_path, FILE_MODE)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """
+    A class that represents the bot's configuration, loaded once from the environment variables.
+
+    :cvar token: The token the bot logs in with.
+    :cvar counting_channels: The IDs of the counting channels, which all share the same count.
+    :cvar testing_guild: The guild to sync the commands to while testing, None to sync them globally.
+    """
+
+    # The token is left out of the repr so that logging the config does not leak it.
+    token: str = field(repr=False)
+    counting_channels: frozenset[int]
+    testing_guild: Optional[discord.Object] = None
+
+    @classmethod
+    def from_environ(cls, environ: Mapping[str, str]) -> "Config":
+        """
+        Creates a Config object from the environment variables.
+        :param environ: The environment variables to read.
+        :return: The Config object.
+        :raises KeyError: If a required environment variable is missing.
+        :raises ValueError: If an environment variable is not valid.
+        """
+
+        token = environ["TOKEN"]
+
+        try:
+            counting_channels = frozenset(
+                int(part) for part in environ["CHANNEL_ID"].split(",")
+            )
+        except ValueError:
+            raise ValueError(
+                "Environment variable CHANNEL_ID must be an integer or a comma-separated list of integers."
+            ) from None
+
+        testing_guild = None
+        if (testing_guild_id := environ.get("TESTING_GUILD")) is not None:
+            try:
+                testing_guild = discord.Object(int(testing_guild_id))
+            except ValueError:
+                raise ValueError(
+                    "Environment variable TESTING_GUILD must be an integer."
+                ) from None
+
+        return cls(token, counting_channels, testing_guild)
+
+
+@dataclass
+class IncrementResult:
+    """
+    A class that represents the outcome of incrementing the count.
+
+    :cvar beat_highest_count: Whether the user has beaten their highest count.
+    :cvar last_highest_count: The user's highest count before the increment.
+    :cvar highest_count: The user's highest count after the increment.
+    :cvar last_rank: The user's rank before the increment, None if they were not ranked.
+    :cvar rank: The user's rank after the increment.
+    """
+
+    beat_highest_count: bool
+    last_highest_count: int
+    highest_count: int
+    last_rank: Optional[int]
+    rank: int
+
+
 @dataclass
 class Count:
     """
@@ -49,7 +179,12 @@ class Count:
     last_user_id: Optional[int] = None
     ignore_repeated_users: bool = False
     leaderboard: Leaderboard = field(default_factory=Leaderboard)
-    _mutex: threading.Lock = field(default_factory=threading.Lock)
+
+    # Bookkeeping for the flush loop, not part of the count itself.
+    _dirty: asyncio.Event = field(
+        default_factory=asyncio.Event, init=False, repr=False, compare=False
+    )
+    _last_saved: float = field(default=0.0, init=False, repr=False, compare=False)
 
     def to_dict(self) -> dict:
         """
@@ -57,13 +192,12 @@ class Count:
         :return: The dictionary containing the data.
         """
 
-        with self._mutex:
-            return {
-                "count": self.count,
-                "last_user_id": self.last_user_id,
-                "ignore_repeated_users": self.ignore_repeated_users,
-                "leaderboard": self.leaderboard.to_dict(),
-            }
+        return {
+            "count": self.count,
+            "last_user_id": self.last_user_id,
+            "ignore_repeated_users": self.ignore_repeated_users,
+            "leaderboard": self.leaderboard.to_dict(),
+        }
 
     @classmethod
     def from_dict(cls, data: dict) -> "Count":
@@ -98,27 +232,92 @@ class Count:
         :param count: The count to reset to.
         """
 
-        with self._mutex:
-            self.count = count
-            self.last_user_id = None
+        self.count = count
+        self.last_user_id = None
+
+    def to_bytes(self) -> bytes:
+        """
+        Converts the Count object to MessagePack encoded bytes.
+        :return: The encoded data.
+        """
+
+        return msgpack.packb(self.to_dict(), use_bin_type=True)
 
-    def save(self, path) -> None:
+    def save(self, path: pathlib.Path) -> None:
         """
         Saves the count to a file.
         :param path: The path to the file.
         """
 
-        with open(path, "w") as f:
-            json.dump(self.to_dict(), f)
+        write_atomic(path, self.to_bytes())
+        self._dirty.clear()
+
+    @property
+    def dirty(self) -> bool:
+        """
+        Returns whether the count has changed since it was last saved.
+        :return: True if the count has unsaved changes, False otherwise.
+        """
+
+        return self._dirty.is_set()
+
+    def mark_dirty(self) -> None:
+        """
+        Marks the count as changed so that it is saved by the next flush.
+        """
+
+        self._dirty.set()
+
+    async def flush_loop(
+        self, path: pathlib.Path, interval: float = SAVE_INTERVAL
+    ) -> None:
+        """
+        Saves the count to a file whenever it has changed, at most once every interval.
+        :param path: The path to the file.
+        :param interval: The minimum number of seconds between saves.
+        """
+
+        while True:
+            await self._dirty.wait()
+
+            # Coalesce a burst of changes into a single save.
+            delay = self._last_saved + interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            # Encode the count on the event loop so that only the disk write happens in another thread.
+            self._dirty.clear()
+            try:
+                await asyncio.to_thread(write_atomic, path, self.to_bytes())
+            except OSError:
+                # Keep the change pending so that it is written by the next save instead of lost.
+                logger.exception("Failed to save the count to file %s", path)
+                self._dirty.set()
+            self._last_saved = time.monotonic()
 
     @classmethod
-    def load(cls, path) -> "Count":
+    def load(cls, path: pathlib.Path) -> "Count":
         """
         Loads the count from a file.
         :param path: The path to the file.
         :return: The loaded count.
         """
 
+        # Decode straight from a memory map of the file rather than reading it into a bytes object first.
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            data = msgpack.unpackb(mm, raw=False, strict_map_key=False)
+        return cls.from_dict(data)
+
+    @classmethod
+    def load_json(cls, path: pathlib.Path) -> "Count":
+        """
+        Loads the count from a file in the JSON format used by earlier versions.
+        :param path: The path to the file.
+        :return: The loaded count.
+        """
+
         with open(path, "r") as f:
             data = json.load(f)
         return cls.from_dict(data)
@@ -159,8 +358,7 @@ class Count:
         if self.ignore_repeated_users:
             return True
 
-        with self._mutex:
-            return self.last_user_id != user_id
+        return self.last_user_id != user_id
 
     def can_increment_to(self, value: int) -> bool:
         """
@@ -169,165 +367,125 @@ class Count:
         :return: True if the count can be incremented, False otherwise.
         """
 
-        with self._mutex:
-            return value == self.next_count
+        return value == self.next_count
 
-    def increment_to(self, value: int, user_id: int) -> bool:
+    def increment_to(self, value: int, user_id: int) -> IncrementResult:
         """
         Increments the count to the given value by the user and checks if the count has beaten the highest count.
         :param value: The value to increment to.
         :param user_id: The ID of the user who incremented the count.
-        :return: True if the count has beaten the highest count, False otherwise.
+        :return: The user's highest count and rank before and after the increment.
+        """
+
+        entry = self.leaderboard.get_entry(user_id)
+        if entry is not None:
+            last_highest_count, last_rank = entry.highest_count, entry.rank
+        else:
+            last_highest_count, last_rank = 0, None
+
+        self.count += 1
+        self.last_user_id = user_id
+        beat_highest_count = self.leaderboard.record_entry(user_id, value)
+
+        # The user always has an entry once their count has been recorded.
+        entry = cast(LeaderboardEntry, self.leaderboard.get_entry(user_id))
+        return IncrementResult(
+            beat_highest_count,
+            last_highest_count,
+            entry.highest_count,
+            last_rank,
+            entry.rank,
+        )
+
+    def check_and_increment(
+        self, value: int, user_id: int
+    ) -> Optional[IncrementResult]:
+        """
+        Increments the count to the given value by the user if they are allowed to, in a single step.
+        :param value: The value to increment to.
+        :param user_id: The ID of the user who wants to increment the count.
+        :return: The result of the increment if the count was incremented, None otherwise.
         """
-        assert self.can_user_increment(user_id), "User cannot increment the count."
-        assert self.can_increment_to(
-            value
-        ), "Count cannot be incremented to the given value."
 
-        with self._mutex:
-            self.count += 1
-            self.last_user_id = user_id
-            return self.leaderboard.record_entry(user_id, value)
+        if not self.can_user_increment(user_id) or not self.can_increment_to(value):
+            return None
+
+        return self.increment_to(value, user_id)
 
 
 # Load environment variables
-if (channel_id := os.getenv("CHANNEL_ID")) is not None:
-    try:
-        counting_channel = int(channel_id)
-    except ValueError:
-        print("Environment variable CHANNEL_ID must be an integer.", file=sys.stderr)
-        sys.exit(1)
-else:
-    print("Missing environment variable CHANNEL_ID.", file=sys.stderr)
+try:
+    config = Config.from_environ(os.environ)
+except KeyError as e:
+    print(f"Missing environment variable {e.args[0]}.", file=sys.stderr)
     sys.exit(1)
-
-token = os.getenv("TOKEN")
-
-if token is None:
-    print("Missing environment variable TOKEN.", file=sys.stderr)
+except ValueError as e:
+    print(e, file=sys.stderr)
     sys.exit(1)
 
-if (testing_guild := os.getenv("TESTING_GUILD")) is not None:
-    try:
-        testing_guild_id = discord.Object(int(testing_guild))
-    except ValueError:
-        print("Environment variable TESTING_GUILD must be an integer.", file=sys.stderr)
-        sys.exit(1)
-else:
-    testing_guild_id = None
-
 # Create the data directory if it doesn't exist and load the count from the file.
 os.makedirs(COUNT_PATH.parent, exist_ok=True)
 
+load_path = COUNT_PATH
+
 try:
-    current_count = Count.load(COUNT_PATH)
-    print(
-        f"Loaded count from file {COUNT_PATH}, current count is {current_count.current_count}, next count is "
-        f"{current_count.next_count}."
-    )
-    current_count.save(COUNT_PATH)
+    try:
+        current_count = Count.load(COUNT_PATH)
+        print(
+            f"Loaded count from file {COUNT_PATH}, current count is {current_count.current_count}, next count is "
+            f"{current_count.next_count}."
+        )
+    except FileNotFoundError:
+        # Convert the count file from the JSON format used by earlier versions if there is one.
+        load_path = LEGACY_COUNT_PATH
+        current_count = Count.load_json(LEGACY_COUNT_PATH)
+        current_count.save(COUNT_PATH)
+        print(f"Migrated count from file {LEGACY_COUNT_PATH} to {COUNT_PATH}.")
 except FileNotFoundError:
     current_count = Count()
     current_count.save(COUNT_PATH)
     print(f"Count file {COUNT_PATH} not found, created a new count file.")
-except json.JSONDecodeError as e:
-    print(f"Failed to load count from file {COUNT_PATH}: {e}", file=sys.stderr)
-    sys.exit(1)
 except KeyError as e:
     print(
-        f"Failed to load count from file {COUNT_PATH}: Missing key {e}", file=sys.stderr
+        f"Failed to load count from file {load_path}: Missing key {e}", file=sys.stderr
     )
     sys.exit(1)
 except ValueError as e:
-    print(f"Failed to load count from file {COUNT_PATH}: {e}", file=sys.stderr)
+    print(f"Failed to load count from file {load_path}: {e}", file=sys.stderr)
     sys.exit(1)
 
 
-def is_roman_numeral(c: str) -> bool:
-    """
-    Checks if a character is a Roman numeral.
-    :param c: The character to check.
-    :return: True if the character is a Roman numeral, False otherwise.
-    """
-    return c in "IVXLCDM"
-
-
-def parse_roman_numeral(message: str) -> Optional[int]:
+def user_mention(user_id: int) -> str:
     """
-    Parses a Roman numeral from the message ignoring any non-Roman numeral characters.
-    :param message: The message to parse.
-    :return: The value of the Roman numeral if any, None otherwise.
+    Returns the mention for a user without fetching the user from Discord.
+    :param user_id: The ID of the user.
+    :return: The mention for the user.
     """
+    return f"<@{user_id}>"
 
-    NUMERALS = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100, "D": 500, "M": 1000}
-
-    i = 0
-    lexeme = ""
-    while i < len(message) and is_roman_numeral(message[i]):
-        lexeme += message[i]
-        i += 1
-
-    if len(lexeme) == 0:
-        return None
-
-    i = 0
-    value = 0
-    while i < len(lexeme):
-        if i + 1 < len(lexeme) and NUMERALS[lexeme[i]] < NUMERALS[lexeme[i + 1]]:
-            value += NUMERALS[lexeme[i + 1]] - NUMERALS[lexeme[i]]
-            i += 2
-        else:
-            value += NUMERALS[lexeme[i]]
-            i += 1
 
-    return value
+# The time each user last sent a number, limited to the most recently active users.
+last_number_times: OrderedDict[int, float] = OrderedDict()
 
 
-def parse_number(message: str) -> Optional[int]:
+def is_rate_limited(user_id: int) -> bool:
     """
-    Parses a number from the message ignoring any non-digit characters.
-    :param message: The message to parse.
-    :return: The number in the message if any, None otherwise.
+    Checks if a user has sent a number too soon after their last one, recording the time of this one otherwise.
+    :param user_id: The ID of the user.
+    :return: True if the number should be ignored, False otherwise.
     """
 
-    i = 0
-    number = ""
-    while i < len(message) and message[i].isalnum():
-        number += message[i]
-        i += 1
-
-    if len(number) == 0:
-        return None
+    now = time.monotonic()
+    last = last_number_times.get(user_id)
+    if last is not None and now - last < RATE_LIMIT_INTERVAL:
+        return True
 
-    if number.startswith("0"):
-        if len(number) > 2:
-            if number[1] == "x":
-                return int(number, 16)
-            elif number[1] == "b":
-                return int(number, 2)
-            elif number[1] == "o":
-                return int(number, 8)
+    last_number_times[user_id] = now
+    last_number_times.move_to_end(user_id)
+    if len(last_number_times) > RATE_LIMIT_MAX_USERS:
+        last_number_times.popitem(last=False)
 
-    return int(number)
-
-
-def parse_message(message: str) -> Optional[int]:
-    """
-    Parses a message and returns the number in the message if any.
-    :param message: The message to parse.
-    :return: The number in the message if any, None otherwise.
-    """
-    if len(message) == 0:
-        return None
-
-    ch = message[0]
-    try:
-        if ch.isdigit():
-            return parse_number(message)
-        # elif is_roman_numeral(ch):
-        #     return parse_roman_numeral(message)
-    except ValueError:
-        return None
+    return False
 
 
 intents = discord.Intents.default()
@@ -336,38 +494,49 @@ intents.message_content = True
 
 class Client(discord.Client):
     """
-    A subclass of discord.Client that includes a command tree.
+    A subclass of discord.Client that includes a command tree and the bot's configuration.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, config: Config, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
+        self.config = config
         self.tree = app_commands.CommandTree(self)
+        self.flush_task: Optional[asyncio.Task] = None
 
     async def setup_hook(self) -> None:
+        # Save the count in the background so that disk writes stay off the message handlers.
+        self.flush_task = asyncio.create_task(current_count.flush_loop(COUNT_PATH))
+
         # Copy the global commands to the testing guild if it exists or sync all commands globally.
-        if testing_guild_id is not None:
-            self.tree.copy_global_to(guild=testing_guild_id)
-            await self.tree.sync(guild=testing_guild_id)
+        if self.config.testing_guild is not None:
+            self.tree.copy_global_to(guild=self.config.testing_guild)
+            await self.tree.sync(guild=self.config.testing_guild)
         else:
             await self.tree.sync()
 
 
-client = Client(intents=intents)
+client = Client(config, intents=intents)
+
+# The ID of the bot's own user, set once the bot has logged in.
+bot_user_id: Optional[int] = None
 
 
 # Handle SIGINT and SIGTERM signals to save the count before exiting.
-def signal_handler(_sig, _frame) -> None:
+def signal_handler(_sig: int, _frame: Optional[FrameType]) -> None:
     """
     Handles the SIGINT and SIGTERM signals to save the count before exiting.
 
     :param _sig: The signal number.
     :param _frame: The current stack frame.
     """
-    current_count.save(COUNT_PATH)
+    if current_count.dirty:
+        current_count.save(COUNT_PATH)
 
-    if testing_guild_id is not None:
-        client.tree.clear_commands(guild=testing_guild_id)
-        client.loop.run_until_complete(client.tree.sync(guild=testing_guild_id))
+    if client.config.testing_guild is not None:
+        client.tree.clear_commands(guild=client.config.testing_guild)
+        client.loop.run_until_complete(
+            client.tree.sync(guild=client.config.testing_guild)
+        )
 
     client.loop.create_task(client.close())
     sys.exit(0)
@@ -382,7 +551,10 @@ async def on_ready() -> None:
     """
     This function is called when the bot is ready to start receiving events.
     """
-    print(f"We have logged in as {client.user}")
+    global bot_user_id
+
+    bot_user_id = client.user.id
+    logger.info("We have logged in as %s", client.user)
 
 
 @client.event
@@ -391,95 +563,106 @@ async def on_message(message: discord.Message) -> None:
     This function is called when a message is sent in a channel that the bot has access to.
     :param message: The message that was sent.
     """
-    global current_count
+    # Ignore messages from channels that are not a counting channel first, as that is most messages.
+    channel = message.channel
+    if channel.id not in client.config.counting_channels:
+        return
 
-    # Ignore messages from the bot and messages from channels that are not the counting channel.
-    is_self_message = message.author == client.user
-    is_counting_channel = message.channel.id == counting_channel
-    is_bot_message = message.author.bot or is_self_message
-    if is_bot_message or not is_counting_channel:
+    # Ignore messages from bots, including this one.
+    author = message.author
+    user_id = author.id
+    if author.bot or user_id == bot_user_id:
         return
 
-    # Check if the message is a number.
-    if (value := parse_message(message.content)) is not None:
-        if not current_count.can_user_increment(message.author.id):
-            print(
-                f"Failed to increment count to {value} by {message.author.id}, current count was "
-                f"{current_count.current_count}, next number is {current_count.count_after_reset}"
-            )
+    # Only messages starting with an ASCII digit can be numbers. Checking here skips parsing chatter, mentions and
+    # commands, and an empty message is rejected too as it sorts before "0".
+    content = message.content
+    if not "0" <= content[:1] <= "9":
+        return
 
-            await message.add_reaction("❌")
-            await message.channel.send(
-                f"{message.author.mention} **RUINED THE COUNT** at {current_count.current_count}. The next number is "
-                f"{current_count.count_after_reset}. **You can't count twice in a row**"
-            )
-            current_count.reset()
-            current_count.save(COUNT_PATH)
+    counter = current_count
+
+    # Check if the message is a number.
+    if (value := parse_message(content)) is not None:
+        # Drop numbers spammed by the same user before they reach the count or Discord's API.
+        if is_rate_limited(user_id):
             return
 
-        if current_count.can_increment_to(value):
-            highest_count = (
-                current_count.leaderboard.highest_count(message.author.id) or 0
+        # Everything that reads or changes the count happens before the first await, as other messages can be
+        # handled while this one waits on Discord and must see the count this message left behind.
+        result = counter.check_and_increment(value, user_id)
+
+        if result is None:
+            logger.debug(
+                "Failed to increment count to %d by %d, current count was %d, next number is %d",
+                value,
+                user_id,
+                counter.current_count,
+                counter.count_after_reset,
             )
-            current_rank = current_count.leaderboard.rank(message.author.id)
 
-            if current_count.increment_to(value, message.author.id):
-                new_highest_count = current_count.leaderboard.highest_count(
-                    message.author.id
-                )
-                new_rank = current_count.leaderboard.rank(message.author.id)
+            template = (
+                RUINED_MESSAGE
+                if counter.can_user_increment(user_id)
+                else RUINED_REPEATED_USER_MESSAGE
+            )
+            content = template.format(
+                mention=author.mention,
+                count=counter.current_count,
+                next_count=counter.count_after_reset,
+            )
 
-                print(f"User {message.author.id} has beaten their highest count")
+            counter.reset()
+            counter.mark_dirty()
 
-                await message.add_reaction("🎉")
+            # The reaction and the reply do not depend on each other, so send both at once.
+            await asyncio.gather(
+                message.add_reaction(REACTION_RUINED), channel.send(content)
+            )
+        elif result.beat_highest_count:
+            logger.debug("User %d has beaten their highest count", user_id)
 
-                content = f"{message.author.mention} **BEAT THEIR HIGHEST COUNT**."
+            counter.mark_dirty()
 
-                if current_rank is not None and new_rank < current_rank:
-                    print(
-                        f"User {message.author.id} has beaten their rank, new rank is {new_rank}, last rank was "
-                        f"{current_rank}."
-                    )
+            content = f"{author.mention} **BEAT THEIR HIGHEST COUNT**."
+            rank_reaction = None
 
-                    previous_ranked_entry = current_count.leaderboard.get_entry_by_rank(
-                        new_rank + 1
-                    )
-                    if previous_ranked_entry is not None:
-                        previous_ranked_user = await message.guild.fetch_member(
-                            previous_ranked_entry.user_id
-                        )
-
-                        await message.add_reaction("🌟")
-                        content += (
-                            f"\nAnd, also **BEAT THEIR RANK** at #{new_rank}. Last rank was #{current_rank}, "
-                            f"beating {previous_ranked_user.mention}."
-                        )
-                    else:
-                        await message.add_reaction("⭐")
-                        content += f"\nAnd, also **BEAT THEIR RANK** at #{new_rank}. Last rank was #{current_rank}."
-
-                await message.channel.send(content)
-            else:
-                print(
-                    f"Count incremented to {current_count.current_count} by {message.author.id}, "
-                    f"next number is {current_count.next_count}"
+            if result.last_rank is not None and result.rank < result.last_rank:
+                logger.debug(
+                    "User %d has beaten their rank, new rank is %d, last rank was %d.",
+                    user_id,
+                    result.rank,
+                    result.last_rank,
                 )
 
-                await message.add_reaction("✅")
+                previous_ranked_entry = counter.leaderboard.get_entry_by_rank(
+                    result.rank + 1
+                )
+                if previous_ranked_entry is not None:
+                    rank_reaction = REACTION_BEAT_USER
+                    content += (
+                        f"\nAnd, also **BEAT THEIR RANK** at #{result.rank}. Last rank was #{result.last_rank}, "
+                        f"beating {user_mention(previous_ranked_entry.user_id)}."
+                    )
+                else:
+                    rank_reaction = REACTION_BEAT_RANK
+                    content += f"\nAnd, also **BEAT THEIR RANK** at #{result.rank}. Last rank was #{result.last_rank}."
+
+            await message.add_reaction(REACTION_HIGHEST_COUNT)
+            if rank_reaction is not None:
+                await message.add_reaction(rank_reaction)
+            await channel.send(content)
         else:
-            print(
-                f"Failed to increment count to {value} by {message.author.id}, current count was "
-                f"{current_count.current_count}, next number is {current_count.count_after_reset}"
+            logger.debug(
+                "Count incremented to %d by %d, next number is %d",
+                counter.current_count,
+                user_id,
+                counter.next_count,
             )
 
-            await message.add_reaction("❌")
-            await message.channel.send(
-                f"{message.author.mention} **RUINED THE COUNT** at {current_count.current_count}. The next number is "
-                f"{current_count.count_after_reset}."
-            )
-            current_count.reset()
+            counter.mark_dirty()
 
-        current_count.save(COUNT_PATH)
+            await message.add_reaction(REACTION_COUNTED)
 
 
 @client.tree.command()
@@ -494,15 +677,15 @@ async def reset_count(
     :param interaction: The interaction that triggered the command.
     :param count: The count to reset to.
     """
-    global current_count
-
-    if interaction.channel.id != counting_channel:
+    if interaction.channel.id not in client.config.counting_channels:
         return
 
+    counter = current_count
+
     count = count or 0
 
-    current_count.reset(count)
-    current_count.save(COUNT_PATH)
+    counter.reset(count)
+    counter.mark_dirty()
 
     await interaction.response.send_message(f"The count has been reset to {count}.")
 
@@ -515,19 +698,17 @@ async def leaderboard(interaction: discord.Interaction) -> None:
 
     :param interaction: The interaction that triggered the command.
     """
-    global current_count
-
-    if interaction.channel.id != counting_channel:
+    if interaction.channel.id not in client.config.counting_channels:
         return
 
-    await interaction.response.defer()
+    counter = current_count
 
-    entries = current_count.leaderboard.top_entries(10)
+    entries = counter.leaderboard.top_entries(10)
 
     embed = discord.Embed(title="Leaderboard", color=discord.Color.blurple())
     embed.set_footer(text="You are not ranked yet.")
 
-    personal_entry = current_count.leaderboard.get_entry(interaction.user.id)
+    personal_entry = counter.leaderboard.get_entry(interaction.user.id)
     if personal_entry is not None:
         embed.set_footer(
             text=(
@@ -538,16 +719,15 @@ async def leaderboard(interaction: discord.Interaction) -> None:
 
     description = ""
     for entry in entries:
-        user = await interaction.guild.fetch_member(entry.user_id)
-
-        description += f"`#{entry.rank}` ・ {user.mention} ・ Highest count: **{entry.highest_count}**\n"
+        description += f"`#{entry.rank}` ・ {user_mention(entry.user_id)} ・ Highest count: **{entry.highest_count}**\n"
 
     if not description:
         description = "No entries yet."
 
     embed.description = description
 
-    await interaction.followup.send(embed=embed)
+    await interaction.response.send_message(embed=embed)
 
 
-client.run(token)
+# Attach discord.py's log handler to the root logger so that this module's log messages are shown too.
+client.run(config.token, root_logger=True)
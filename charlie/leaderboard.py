@@ -14,12 +14,28 @@ This module contains classes for storing leaderboard data.
 #  You should have received a copy of the GNU General Public License along with charlie. If not,
 #  see <https://www.gnu.org/licenses/>.
 
-import bisect
 from dataclasses import dataclass, field
+from itertools import starmap
+from operator import attrgetter, itemgetter
 from typing import Optional
 
+from sortedcontainers import SortedKeyList
 
-@dataclass
+
+# The fields of a leaderboard entry in the order they are passed to its constructor.
+_FIELDS = (
+    "user_id",
+    "highest_count",
+    "last_highest_count",
+    "times_counted",
+    "mistakes_made",
+    "rank",
+    "last_rank",
+)
+_get_fields = itemgetter(*_FIELDS)
+
+
+@dataclass(slots=True)
 class LeaderboardEntry:
     """
     This class is used to store leaderboard entry data.
@@ -29,6 +45,8 @@ class LeaderboardEntry:
     :cvar last_highest_count: The user's last highest count.
     :cvar times_counted: The number of times the user has counted.
     :cvar mistakes_made: The number of mistakes the user has made.
+    :cvar rank: The user's rank.
+    :cvar last_rank: The user's rank before it last changed.
     """
 
     user_id: int
@@ -65,38 +83,47 @@ class LeaderboardEntry:
         :return: The created leaderboard entry.
         """
 
-        return cls(
-            data["user_id"],
-            data["highest_count"],
-            data["last_highest_count"],
-            data["times_counted"],
-            data["mistakes_made"],
-            data["rank"],
-            data["last_rank"],
-        )
+        return cls(*_get_fields(data))
+
+
+def _sort_key(entry: LeaderboardEntry) -> int:
+    """
+    Gets the key that sorts leaderboard entries by highest count in descending order.
+
+    :param entry: The leaderboard entry.
+    :return: The sort key of the entry.
+    """
+
+    return -entry.highest_count
 
 
-@dataclass
+@dataclass(slots=True)
 class Leaderboard:
     """
     This class is used to store leaderboard data.
 
     :cvar entries: The leaderboard entries sorted by highest count.
-    :cvar user_ids: A mapping of user IDs to their index in the entries list.
+    :cvar user_ids: A mapping of user IDs to their leaderboard entries.
     """
 
-    entries: list[LeaderboardEntry] = field(default_factory=list)
-    user_ids: dict[int, int] = field(default_factory=dict)
+    entries: SortedKeyList = field(default_factory=lambda: SortedKeyList(key=_sort_key))
+    user_ids: dict[int, LeaderboardEntry] = field(default_factory=dict)
 
-    def _reindex(self) -> None:
+    # The top entries by the number requested, cleared whenever the order of the entries changes.
+    _top_cache: dict[int, tuple[LeaderboardEntry, ...]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def _rerank(self, start: int, stop: int) -> None:
         """
-        Reindex the user IDs.
+        Updates the ranks of the entries whose position changed.
+
+        :param start: The index of the first entry to update.
+        :param stop: The index after the last entry to update.
         """
 
-        for index, entry in enumerate(self.entries):
-            self.user_ids[entry.user_id] = index
-            self.entries[index].last_rank = self.entries[index].rank
-            self.entries[index].rank = index + 1
+        for rank, entry in enumerate(self.entries.islice(start, stop), start + 1):
+            entry.rank, entry.last_rank = rank, entry.rank
 
     def record_entry(self, user_id: int, count: int) -> bool:
         """
@@ -107,37 +134,52 @@ class Leaderboard:
         :return: True if their highest count was broken, False otherwise.
         """
 
-        index = self.user_ids.get(user_id)
+        entry = self.user_ids.get(user_id)
 
-        # If the user doesn't exist, add them to the leaderboard.
-        if index is None:
+        # If the user doesn't exist, add them to the leaderboard and move down the entries after them.
+        if entry is None:
             entry = LeaderboardEntry(user_id, count, times_counted=1)
-            bisect.insort_right(self.entries, entry, key=lambda x: -x.highest_count)
-            self._reindex()
+            self.user_ids[user_id] = entry
+            self.entries.add(entry)
+            self._rerank(self._index_of(entry), len(self.entries))
+            self._top_cache.clear()
             return True
 
         # Else, update their entry.
-        entry = self.entries[index]
         entry.times_counted += 1
 
         # If the user's highest count was broken, update it.
         if count > entry.highest_count:
+            index = entry.rank - 1
+
+            # The entry has to be taken out of the sorted list while its sort key changes. Deleting it by its known
+            # index avoids searching the list for it.
+            del self.entries[index]
             entry.last_highest_count = entry.highest_count
             entry.highest_count = count
+            self.entries.add(entry)
 
-            # If the user's new highest count is higher than the entry before them, move them up.
-            if index > 0 and self.entries[index - 1].highest_count < count:
-                new_index = bisect.bisect_right(
-                    self.entries, -count, hi=index, key=lambda x: -x.highest_count
-                )
-                del self.entries[index]
-                self.entries.insert(new_index, entry)
-                self._reindex()
+            # If the user has moved up, only the entries they passed change rank.
+            new_index = self._index_of(entry)
+            if new_index < index:
+                self._rerank(new_index, index + 1)
+                self._top_cache.clear()
 
             return True
 
         return False
 
+    def _index_of(self, entry: LeaderboardEntry) -> int:
+        """
+        Gets the index of an entry that was just added to the sorted list.
+
+        :param entry: The leaderboard entry.
+        :return: The index of the entry.
+        """
+
+        # Added entries go after any entries with the same highest count.
+        return self.entries.bisect_key_right(_sort_key(entry)) - 1
+
     def remove_entry(self, user_id: int) -> None:
         """
         Removes an entry from the leaderboard.
@@ -145,10 +187,12 @@ class Leaderboard:
         :param user_id: The user's ID.
         """
 
-        if user_id in self.user_ids:
-            entry_index = self.user_ids[user_id]
-            del self.entries[entry_index]
-            self._reindex()
+        entry = self.user_ids.pop(user_id, None)
+        if entry is not None:
+            index = entry.rank - 1
+            del self.entries[index]
+            self._rerank(index, len(self.entries))
+            self._top_cache.clear()
 
     def get_entry(self, user_id: int) -> Optional[LeaderboardEntry]:
         """
@@ -158,10 +202,7 @@ class Leaderboard:
         :return: The leaderboard entry if it exists, None otherwise.
         """
 
-        if user_id not in self.user_ids:
-            return None
-
-        return self.entries[self.user_ids[user_id]]
+        return self.user_ids.get(user_id)
 
     def get_entry_by_rank(self, rank: int) -> Optional[LeaderboardEntry]:
         """
@@ -176,7 +217,7 @@ class Leaderboard:
 
         return None
 
-    def top_entries(self, n: int) -> list[LeaderboardEntry]:
+    def top_entries(self, n: int) -> tuple[LeaderboardEntry, ...]:
         """
         Gets the top n entries from the leaderboard.
 
@@ -184,7 +225,11 @@ class Leaderboard:
         :return: The top n entries.
         """
 
-        return self.entries[:n]
+        top = self._top_cache.get(n)
+        if top is None:
+            top = self._top_cache[n] = tuple(self.entries.islice(0, n))
+
+        return top
 
     def highest_count(self, user_id: int) -> Optional[int]:
         """
@@ -194,10 +239,8 @@ class Leaderboard:
         :return: The user's highest count if they exist in the leaderboard, None otherwise.
         """
 
-        if user_id not in self.user_ids:
-            return None
-
-        return self.entries[self.user_ids[user_id]].highest_count
+        entry = self.user_ids.get(user_id)
+        return None if entry is None else entry.highest_count
 
     def last_highest_count(self, user_id: int) -> Optional[int]:
         """
@@ -207,10 +250,8 @@ class Leaderboard:
         :return: The user's last highest count if they exist in the leaderboard, None otherwise.
         """
 
-        if user_id not in self.user_ids:
-            return None
-
-        return self.entries[self.user_ids[user_id]].last_highest_count
+        entry = self.user_ids.get(user_id)
+        return None if entry is None else entry.last_highest_count
 
     def rank(self, user_id: int) -> Optional[int]:
         """
@@ -220,10 +261,8 @@ class Leaderboard:
         :return: The user's rank if they exist in the leaderboard, None otherwise.
         """
 
-        if user_id not in self.user_ids:
-            return None
-
-        return self.entries[self.user_ids[user_id]].rank
+        entry = self.user_ids.get(user_id)
+        return None if entry is None else entry.rank
 
     def last_rank(self, user_id: int) -> Optional[int]:
         """
@@ -233,10 +272,8 @@ class Leaderboard:
         :return: The user's last rank if they exist in the leaderboard, None otherwise.
         """
 
-        if user_id not in self.user_ids:
-            return None
-
-        return self.entries[self.user_ids[user_id]].last_rank
+        entry = self.user_ids.get(user_id)
+        return None if entry is None else entry.last_rank
 
     def to_dict(self) -> dict:
         """
@@ -245,9 +282,12 @@ class Leaderboard:
         :return: The leaderboard as a dictionary.
         """
 
+        # Store one list per field rather than a dictionary per entry, which keeps the size of the
+        # dictionary independent of the number of entries.
         return {
-            "entries": [entry.to_dict() for entry in self.entries],
-            "user_ids": self.user_ids,
+            "entries": {
+                name: list(map(attrgetter(name), self.entries)) for name in _FIELDS
+            },
         }
 
     @classmethod
@@ -259,11 +299,25 @@ class Leaderboard:
         :return: The created leaderboard.
         """
 
+        entries = data["entries"]
+        if isinstance(entries, dict):
+            # Every field must have a value for every entry, a shorter list means the data is corrupt.
+            entries = starmap(
+                LeaderboardEntry,
+                zip(*_get_fields(entries), strict=True),
+            )
+        else:
+            # Earlier versions stored each entry as a dictionary.
+            entries = map(LeaderboardEntry.from_dict, entries)
+
         leaderboard = cls()
-        leaderboard.entries = [
-            LeaderboardEntry.from_dict(entry_data) for entry_data in data["entries"]
-        ]
-        leaderboard.user_ids = {
-            int(user_id): index for user_id, index in data["user_ids"].items()
-        }
+        leaderboard.entries = SortedKeyList(entries, key=_sort_key)
+
+        # Rank and index the entries in a single pass. The ranks are used to find the entries in the sorted list, so
+        # they must match the order of the entries.
+        user_ids = leaderboard.user_ids
+        for rank, entry in enumerate(leaderboard.entries, 1):
+            entry.rank = rank
+            user_ids[entry.user_id] = entry
+
         return leaderboard
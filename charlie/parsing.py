@@ -0,0 +1,110 @@
+"""
+This module contains functions for parsing numbers from messages.
+"""
+
+#  This file is part of charlie.
+#
+#  charlie is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+#  License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any
+#  later version.
+#
+#  charlie is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+#  warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with charlie. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+import re
+from typing import Optional, cast
+
+NUMBER_PATTERN = re.compile(
+    r"0x(?P<hex>[0-9a-fA-F]+)|0b(?P<bin>[01]+)|0o(?P<oct>[0-7]+)|(?P<dec>[0-9]+)"
+)
+NUMBER_BASES = {"hex": 16, "bin": 2, "oct": 8, "dec": 10}
+
+
+def is_roman_numeral(c: str) -> bool:
+    """
+    Checks if a character is a Roman numeral.
+    :param c: The character to check.
+    :return: True if the character is a Roman numeral, False otherwise.
+    """
+    return c in "IVXLCDM"
+
+
+def parse_roman_numeral(message: str) -> Optional[int]:
+    """
+    Parses a Roman numeral from the message ignoring any non-Roman numeral characters.
+    :param message: The message to parse.
+    :return: The value of the Roman numeral if any, None otherwise.
+    """
+
+    NUMERALS = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100, "D": 500, "M": 1000}
+
+    i = 0
+    lexeme = ""
+    while i < len(message) and is_roman_numeral(message[i]):
+        lexeme += message[i]
+        i += 1
+
+    if len(lexeme) == 0:
+        return None
+
+    i = 0
+    value = 0
+    while i < len(lexeme):
+        if i + 1 < len(lexeme) and NUMERALS[lexeme[i]] < NUMERALS[lexeme[i + 1]]:
+            value += NUMERALS[lexeme[i + 1]] - NUMERALS[lexeme[i]]
+            i += 2
+        else:
+            value += NUMERALS[lexeme[i]]
+            i += 1
+
+    return value
+
+
+def parse_number(message: str) -> Optional[int]:
+    """
+    Parses a number from the message ignoring any non-digit characters.
+    :param message: The message to parse.
+    :return: The number in the message if any, None otherwise.
+    """
+
+    match = NUMBER_PATTERN.match(message)
+    if match is None:
+        return None
+
+    # A number running straight into letters or other digits, such as "12abc", is not a number.
+    end = match.end()
+    if end < len(message) and message[end].isalnum():
+        return None
+
+    # Every alternative in the pattern is a named group, so the last group is always set.
+    group = cast(str, match.lastgroup)
+    return int(match[group], NUMBER_BASES[group])
+
+
+def parse_message(message: str) -> Optional[int]:
+    """
+    Parses a message and returns the number in the message if any.
+    :param message: The message to parse.
+    :return: The number in the message if any, None otherwise.
+    """
+    if len(message) == 0:
+        return None
+
+    # Only ASCII digits start a number, which rejects most chatter with a single comparison.
+    ch = message[0]
+    try:
+        if "0" <= ch <= "9":
+            # Most counts are a bare number, which int parses in one pass without the pattern. isdigit alone also
+            # accepts digits like "²" that int rejects, so non-ASCII messages are left to the pattern.
+            if message.isascii() and message.isdigit():
+                return int(message)
+            return parse_number(message)
+        # elif is_roman_numeral(ch):
+        #     return parse_roman_numeral(message)
+    except ValueError:
+        return None
+
+    return None
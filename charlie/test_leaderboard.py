@@ -0,0 +1,156 @@
+#  This file is part of charlie.
+#
+#  charlie is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+#  License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any
+#  later version.
+#
+#  charlie is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+#  warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with charlie. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from charlie.leaderboard import Leaderboard, LeaderboardEntry
+
+
+def ranking(leaderboard: Leaderboard) -> list[tuple[int, int, int]]:
+    """
+    Gets the user ID, highest count and rank of every entry in order, checking that the ranks match the positions.
+    """
+
+    for index, entry in enumerate(leaderboard.entries):
+        assert entry.rank == index + 1
+        assert leaderboard.user_ids[entry.user_id] is entry
+
+    assert len(leaderboard.user_ids) == len(leaderboard.entries)
+    return [
+        (entry.user_id, entry.highest_count, entry.rank)
+        for entry in leaderboard.entries
+    ]
+
+
+def test_new_user_mid_table() -> None:
+    leaderboard = Leaderboard()
+    assert leaderboard.record_entry(1, 30)
+    assert leaderboard.record_entry(2, 10)
+    assert leaderboard.record_entry(3, 20)
+
+    assert ranking(leaderboard) == [(1, 30, 1), (3, 20, 2), (2, 10, 3)]
+    assert leaderboard.last_rank(2) == 2
+
+
+def test_new_user_goes_after_ties() -> None:
+    leaderboard = Leaderboard()
+    leaderboard.record_entry(1, 10)
+    leaderboard.record_entry(2, 10)
+
+    assert ranking(leaderboard) == [(1, 10, 1), (2, 10, 2)]
+
+
+def test_move_up_past_ties() -> None:
+    leaderboard = Leaderboard()
+    leaderboard.record_entry(1, 20)
+    leaderboard.record_entry(2, 20)
+    leaderboard.record_entry(3, 10)
+
+    assert leaderboard.record_entry(3, 20)
+    assert ranking(leaderboard) == [(1, 20, 1), (2, 20, 2), (3, 20, 3)]
+
+    assert leaderboard.record_entry(3, 21)
+    assert ranking(leaderboard) == [(3, 21, 1), (1, 20, 2), (2, 20, 3)]
+    assert leaderboard.last_rank(3) == 3
+    assert leaderboard.last_highest_count(3) == 20
+    assert leaderboard.last_rank(2) == 2
+
+
+def test_lower_count_does_not_move() -> None:
+    leaderboard = Leaderboard()
+    leaderboard.record_entry(1, 20)
+    leaderboard.record_entry(2, 10)
+
+    assert not leaderboard.record_entry(1, 5)
+    assert ranking(leaderboard) == [(1, 20, 1), (2, 10, 2)]
+
+    entry = leaderboard.get_entry(1)
+    assert entry is not None
+    assert entry.times_counted == 2
+
+
+def test_remove_entry_reranks() -> None:
+    leaderboard = Leaderboard()
+    for user_id, count in ((1, 40), (2, 30), (3, 20), (4, 10)):
+        leaderboard.record_entry(user_id, count)
+
+    leaderboard.remove_entry(2)
+    assert ranking(leaderboard) == [(1, 40, 1), (3, 20, 2), (4, 10, 3)]
+    assert leaderboard.get_entry(2) is None
+    assert leaderboard.rank(2) is None
+
+    # Removing a user that is not on the leaderboard does nothing.
+    leaderboard.remove_entry(2)
+    assert ranking(leaderboard) == [(1, 40, 1), (3, 20, 2), (4, 10, 3)]
+
+
+def test_top_entries_cache() -> None:
+    leaderboard = Leaderboard()
+    leaderboard.record_entry(1, 30)
+    leaderboard.record_entry(2, 20)
+
+    top = leaderboard.top_entries(2)
+    assert [entry.user_id for entry in top] == [1, 2]
+    assert leaderboard.top_entries(2) is top
+
+    # A higher count that does not change the order keeps the cache.
+    leaderboard.record_entry(2, 25)
+    assert leaderboard.top_entries(2) is top
+    assert top[1].highest_count == 25
+
+    leaderboard.record_entry(2, 35)
+    assert [entry.user_id for entry in leaderboard.top_entries(2)] == [2, 1]
+
+    leaderboard.record_entry(3, 40)
+    assert [entry.user_id for entry in leaderboard.top_entries(2)] == [3, 2]
+
+    leaderboard.remove_entry(3)
+    assert [entry.user_id for entry in leaderboard.top_entries(2)] == [2, 1]
+
+
+def test_from_dict_columns() -> None:
+    leaderboard = Leaderboard()
+    for user_id, count in ((1, 10), (2, 30), (3, 20)):
+        leaderboard.record_entry(user_id, count)
+    leaderboard.record_entry(1, 40)
+
+    loaded = Leaderboard.from_dict(leaderboard.to_dict())
+    assert ranking(loaded) == ranking(leaderboard)
+    assert list(loaded.entries) == list(leaderboard.entries)
+
+
+def test_from_dict_legacy_entries() -> None:
+    data = {
+        "entries": [
+            LeaderboardEntry(1, 10, rank=1).to_dict(),
+            LeaderboardEntry(2, 30, rank=2).to_dict(),
+        ],
+        "user_ids": {1: 0, 2: 1},
+    }
+
+    # The stored ranks are replaced by the order of the highest counts.
+    assert ranking(Leaderboard.from_dict(data)) == [(2, 30, 1), (1, 10, 2)]
+
+
+def test_from_dict_columns_of_different_lengths() -> None:
+    data = Leaderboard.from_dict(
+        {
+            "entries": [
+                LeaderboardEntry(1, 10).to_dict(),
+                LeaderboardEntry(2, 20).to_dict(),
+            ]
+        }
+    ).to_dict()
+    data["entries"]["times_counted"].pop()
+
+    with pytest.raises(ValueError):
+        Leaderboard.from_dict(data)
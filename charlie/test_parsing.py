@@ -0,0 +1,50 @@
+#  This file is part of charlie.
+#
+#  charlie is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+#  License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any
+#  later version.
+#
+#  charlie is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+#  warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with charlie. If not,
+#  see <https://www.gnu.org/licenses/>.
+
+from typing import Optional
+
+import pytest
+
+from charlie.parsing import parse_message
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ("", None),
+        ("1", 1),
+        ("42", 42),
+        ("007", 7),
+        ("12 abc", 12),
+        ("12, nice", 12),
+        ("0x1F", 31),
+        ("0x1f", 31),
+        ("0b101", 5),
+        ("0o17", 15),
+        # Prefixes are lowercase only, and a prefix without digits is not a number.
+        ("0X1F", None),
+        ("0x", None),
+        # A number running straight into letters or other digits is not a number.
+        ("0b12", None),
+        ("12abc", None),
+        ("1²", None),
+        # An underscore is not part of the number, so only the digits before it count.
+        ("1_000", 1),
+        # Only ASCII digits are numbers.
+        ("١٢", None),
+        ("²", None),
+        ("abc", None),
+        (" 1", None),
+    ],
+)
+def test_parse_message(message: str, expected: Optional[int]) -> None:
+    assert parse_message(message) == expected